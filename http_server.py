@@ -5,11 +5,28 @@ Server HTTP con librerie standard Python
 """
 
 import json
+import os
 import random
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import re
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import ssl
 
+# orjson (opzionale) serializza direttamente in bytes UTF-8; altrimenti libreria standard
+try:
+    import orjson
+    
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+    
+    json_loads = json.loads
+
+# Dimensione massima accettata per il body delle richieste POST
+MAX_BODY_SIZE = 64 * 1024
+
 # Risposte mock
 MOCK_RESPONSES = {
     "it": {
@@ -68,135 +85,168 @@ MOCK_RESPONSES = {
     }
 }
 
+# Parole chiave per categoria, nell'ordine di priorità del rilevamento
+CATEGORY_KEYWORDS = {
+    "permesso_soggiorno": ("permesso", "soggiorno", "questura", "documenti", "residence", "permit"),
+    "sanita": ("sanità", "medico", "ospedale", "salute", "cure", "health", "medical"),
+    "lavoro": ("lavoro", "lavorare", "contratto", "stipendio", "work", "job"),
+    "casa": ("casa", "affitto", "abitazione", "alloggio", "house", "housing"),
+    "educazione": ("scuola", "studio", "educazione", "università", "corso", "school", "education"),
+}
+
+# Un'unica regex compilata per categoria: stessa ricerca per sottostringa del ciclo originale
+# ("jobs", "healthcare" e "houses" continuano a corrispondere) in una sola scansione in C
+CATEGORY_PATTERNS = [
+    (category, re.compile("|".join(re.escape(word) for word in keywords)))
+    for category, keywords in CATEGORY_KEYWORDS.items()
+]
+
 def detect_category(message: str) -> str:
     """Rileva la categoria della domanda"""
     message_lower = message.lower()
     
-    if any(word in message_lower for word in ["permesso", "soggiorno", "questura", "documenti", "residence", "permit"]):
-        return "permesso_soggiorno"
-    elif any(word in message_lower for word in ["sanità", "medico", "ospedale", "salute", "cure", "health", "medical"]):
-        return "sanita"
-    elif any(word in message_lower for word in ["lavoro", "lavorare", "contratto", "stipendio", "work", "job"]):
-        return "lavoro"
-    elif any(word in message_lower for word in ["casa", "affitto", "abitazione", "alloggio", "house", "housing"]):
-        return "casa"
-    elif any(word in message_lower for word in ["scuola", "studio", "educazione", "università", "corso", "school", "education"]):
-        return "educazione"
-    else:
-        return "generale"
+    for category, pattern in CATEGORY_PATTERNS:
+        if pattern.search(message_lower):
+            return category
+    return "generale"
+
+# Fonti simulate per le categorie specifiche
+CHAT_SOURCES = [
+    {
+        "title": "Portale Immigrazione - Ministero dell'Interno",
+        "url": "https://www.interno.gov.it/it/temi/immigrazione-e-asilo",
+        "content": "Informazioni ufficiali su immigrazione e procedure"
+    }
+]
+
+# Indice piatto (lingua, categoria) -> (risposte, fonti), costruito una sola volta
+RESPONSE_INDEX = {
+    (language, category): (
+        tuple(responses.get(category, MOCK_RESPONSES["it"]["generale"])),
+        [] if category == "generale" else CHAT_SOURCES
+    )
+    for language, responses in MOCK_RESPONSES.items()
+    for category in (*CATEGORY_KEYWORDS, "generale")
+}
+
+# Risposte GET costanti, serializzate una sola volta all'avvio
+HEALTH_RESPONSE_BYTES = json_dumps({
+    "status": "healthy",
+    "version": "1.0.0",
+    "components": {
+        "ai_engine": "operational",
+        "translator": "mock", 
+        "legal_processor": "mock"
+    }
+})
+
+LANGUAGES_RESPONSE_BYTES = json_dumps({
+    "languages": {
+        "it": "Italiano",
+        "fr": "Français", 
+        "en": "English",
+        "wo": "Wolof",
+        "bm": "Bambara",
+        "ha": "Hausa",
+        "sw": "Swahili",
+        "ti": "Tigrinya",
+        "am": "Amarico",
+        "snk": "Soninke",
+        "ff": "Pulaar",
+        "ln": "Lingala"
+    }
+})
+
+NOT_FOUND_BYTES = json_dumps({"error": "Not found"})
 
 class JokkoHandler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
+    # TCP_NODELAY: le risposte JSON brevi partono senza attendere l'ACK
+    disable_nagle_algorithm = True
+    # wfile bufferizzato: headers e body escono insieme al flush di fine richiesta
+    wbufsize = -1
+    
+    if os.environ.get('JOKKO_QUIET') == '1':
+        def log_request(self, code='-', size='-'):
+            """Access log disattivato: nessuna write su stderr per richiesta (gli errori restano)"""
+            
+    def send_json(self, body: bytes):
+        """Invia una risposta JSON con Content-Length e headers CORS"""
         self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
-
-    def do_GET(self):
-        parsed_path = urlparse(self.path)
+        self.wfile.write(body)
         
-        # Headers CORS
+    def do_OPTIONS(self):
+        """Handle CORS preflight requests"""
         self.send_response(200)
-        self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
+
+    def do_GET(self):
+        parsed_path = urlparse(self.path)
         
         if parsed_path.path == '/api/health':
-            response = {
-                "status": "healthy",
-                "version": "1.0.0",
-                "components": {
-                    "ai_engine": "operational",
-                    "translator": "mock", 
-                    "legal_processor": "mock"
-                }
-            }
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(HEALTH_RESPONSE_BYTES)
             
         elif parsed_path.path == '/api/languages':
-            response = {
-                "languages": {
-                    "it": "Italiano",
-                    "fr": "Français", 
-                    "en": "English",
-                    "wo": "Wolof",
-                    "bm": "Bambara",
-                    "ha": "Hausa",
-                    "sw": "Swahili",
-                    "ti": "Tigrinya",
-                    "am": "Amarico",
-                    "snk": "Soninke",
-                    "ff": "Pulaar",
-                    "ln": "Lingala"
-                }
-            }
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json(LANGUAGES_RESPONSE_BYTES)
         else:
-            self.wfile.write(json.dumps({"error": "Not found"}).encode())
+            self.send_json(NOT_FOUND_BYTES)
 
     def do_POST(self):
-        # Headers CORS
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
+        # Solo cifre ASCII e un solo header: int() accetterebbe anche "-5", "+5" o " 5"
+        content_length_values = self.headers.get_all('Content-Length', [])
+        value = content_length_values[0] if content_length_values else "0"
+        if len(content_length_values) > 1 or not (value.isascii() and value.isdigit()):
+            self.send_error(400, "Content-Length non valido")
+            return
+        content_length = int(value)
+        if content_length > MAX_BODY_SIZE:
+            self.send_error(413, "Richiesta troppo grande")
+            return
+        post_data = self.rfile.read(content_length) if content_length > 0 else b''
         
         parsed_path = urlparse(self.path)
         
         if parsed_path.path == '/api/chat':
             try:
-                data = json.loads(post_data.decode())
+                data = json_loads(post_data)
                 message = data.get('message', '')
                 language = data.get('language', 'it')
                 
                 # Rileva categoria
                 category = detect_category(message)
                 
-                # Seleziona lingua (fallback all'italiano)
-                if language not in MOCK_RESPONSES:
+                # Seleziona lingua (fallback all'italiano) e risposte con un'unica lookup
+                entry = RESPONSE_INDEX.get((language, category))
+                if entry is None:
                     language = "it"
-                
-                # Seleziona risposta appropriata
-                responses = MOCK_RESPONSES[language].get(category, MOCK_RESPONSES["it"]["generale"])
-                response_text = random.choice(responses)
-                
-                # Simula fonti per alcune categorie
-                sources = []
-                if category != "generale":
-                    sources = [
-                        {
-                            "title": "Portale Immigrazione - Ministero dell'Interno",
-                            "url": "https://www.interno.gov.it/it/temi/immigrazione-e-asilo",
-                            "content": "Informazioni ufficiali su immigrazione e procedure"
-                        }
-                    ]
+                    entry = RESPONSE_INDEX[(language, category)]
+                responses, sources = entry
                 
                 response = {
-                    "response": response_text,
+                    "response": random.choice(responses),
                     "language": language,
                     "sources": sources,
                     "category": category,
                     "confidence": 0.95
                 }
                 
-                self.wfile.write(json.dumps(response).encode())
+                self.send_json(json_dumps(response))
                 
             except Exception as e:
                 error_response = {"error": f"Errore nel processing: {str(e)}"}
-                self.wfile.write(json.dumps(error_response).encode())
+                self.send_json(json_dumps(error_response))
                 
         elif parsed_path.path == '/api/translate':
             try:
-                data = json.loads(post_data.decode())
+                data = json_loads(post_data)
                 text = data.get('text', '')
                 target_language = data.get('target_language', 'it')
                 
@@ -205,13 +255,13 @@ class JokkoHandler(BaseHTTPRequestHandler):
                     "target_language": target_language
                 }
                 
-                self.wfile.write(json.dumps(response).encode())
+                self.send_json(json_dumps(response))
                 
             except Exception as e:
                 error_response = {"error": f"Errore traduzione: {str(e)}"}
-                self.wfile.write(json.dumps(error_response).encode())
+                self.send_json(json_dumps(error_response))
         else:
-            self.wfile.write(json.dumps({"error": "Not found"}).encode())
+            self.send_json(NOT_FOUND_BYTES)
 
 if __name__ == '__main__':
     print("🚀 Avvio JOKKO AI Backend HTTP Server...")
@@ -222,7 +272,8 @@ if __name__ == '__main__':
     print("   POST /api/chat")
     print("   POST /api/translate")
     
-    server = HTTPServer(('0.0.0.0', 8000), JokkoHandler)
+    # Un thread per connessione: una richiesta lenta non blocca le altre
+    server = ThreadingHTTPServer(('0.0.0.0', 8000), JokkoHandler)
     try:
         server.serve_forever()
     except KeyboardInterrupt:
@@ -10,14 +10,163 @@ Data: 2025-06-20
 import json
 import asyncio
 import re
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import logging
 
 # Configurazione logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Messaggi conservati nello storico di ciascun utente
+HISTORY_MAX_MESSAGES = 10
+
+# Cache risposte: numero massimo di voci e lunghezza massima dei messaggi memorizzati
+RESPONSE_CACHE_SIZE = 4096
+RESPONSE_CACHE_MAX_LENGTH = 512
+
+# Indicatori per il rilevamento semplificato della lingua
+LANGUAGE_INDICATORS = {
+    "it": ["è", "perché", "così", "però", "già", "più"],
+    "fr": ["est", "être", "avec", "pour", "que", "où"],
+    "en": ["the", "and", "for", "with", "this", "that"]
+}
+INDICATOR_LANGUAGE = {word: lang for lang, words in LANGUAGE_INDICATORS.items() for word in words}
+# Lookahead: le corrispondenze sovrapposte vengono tutte trovate ("questo" contiene sia "que" sia "est")
+INDICATOR_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(word) for word in sorted(INDICATOR_LANGUAGE, key=len, reverse=True)) + "))"
+)
+
+# Messaggi di benvenuto per lingua
+GREETING_RESPONSES = {
+    "it": """Ciao! Sono JOKKO AI 🥁, il tuo assistente personale per navigare la vita in Italia.
+            
+Sono qui per aiutarti con:
+• 📋 Permesso di soggiorno e documenti
+• 🏥 Sanità e assistenza medica  
+• 💼 Lavoro e diritti lavorativi
+• 🏠 Casa e residenza
+• 📚 Educazione e formazione
+
+Scrivi la tua domanda nella lingua che preferisci. Come posso aiutarti oggi?""",
+
+    "fr": """Salut! Je suis JOKKO AI 🥁, votre assistant personnel pour naviguer la vie en Italie.
+
+Je suis là pour vous aider avec:
+• 📋 Permis de séjour et documents
+• 🏥 Santé et assistance médicale
+• 💼 Travail et droits du travail
+• 🏠 Logement et résidence
+• 📚 Éducation et formation
+
+Écrivez votre question dans la langue que vous préférez. Comment puis-je vous aider aujourd'hui?""",
+
+    "en": """Hello! I'm JOKKO AI 🥁, your personal assistant for navigating life in Italy.
+
+I'm here to help you with:
+• 📋 Residence permits and documents
+• 🏥 Health and medical assistance
+• 💼 Work and labor rights
+• 🏠 Housing and residence
+• 📚 Education and training
+
+Write your question in your preferred language. How can I help you today?"""
+}
+
+# Numeri utili per le emergenze, per lingua
+EMERGENCY_RESPONSES = {
+    "it": """🚨 EMERGENZA - NUMERI UTILI IMMEDIATI:
+
+• 🚑 Emergenza medica: 118
+• 🚔 Polizia: 113
+• 🚒 Vigili del Fuoco: 115
+• 🆘 Carabinieri: 112
+
+Se hai bisogno di assistenza immediata, chiama questi numeri. Per questioni non urgenti, continua pure a scrivermi e ti aiuterò con le informazioni che cerchi.""",
+
+    "fr": """🚨 URGENCE - NUMÉROS UTILES IMMÉDIATS:
+
+• 🚑 Urgence médicale: 118
+• 🚔 Police: 113
+• 🚒 Pompiers: 115
+• 🆘 Carabiniers: 112
+
+Si vous avez besoin d'une assistance immédiate, appelez ces numéros. Pour des questions non urgentes, continuez à m'écrire et je vous aiderai.""",
+
+    "en": """🚨 EMERGENCY - IMMEDIATE USEFUL NUMBERS:
+
+• 🚑 Medical emergency: 118
+• 🚔 Police: 113
+• 🚒 Fire department: 115
+• 🆘 Carabinieri: 112
+
+If you need immediate assistance, call these numbers. For non-urgent matters, continue writing to me and I'll help you."""
+}
+
+# Chiusura delle risposte per categoria
+CATEGORY_FINAL_MESSAGES = {
+    "it": "\n\n💭 Hai altre domande su questo argomento? Scrivimi per maggiori dettagli!",
+    "fr": "\n\n💭 Avez-vous d'autres questions sur ce sujet? Écrivez-moi pour plus de détails!",
+    "en": "\n\n💭 Do you have other questions on this topic? Write to me for more details!"
+}
+
+# Risposte quando nessuna categoria corrisponde
+FALLBACK_RESPONSES = {
+    "it": """Non sono sicuro di aver capito la tua domanda. Però sono qui per aiutarti! 
+
+Prova a riformulare la domanda o scegli uno di questi argomenti:
+• 📋 Permesso di soggiorno
+• 🏥 Sanità e salute
+• 💼 Lavoro
+• 🏠 Casa e residenza
+• 📚 Educazione
+
+Oppure scrivi semplicemente quello che ti serve e farò del mio meglio per aiutarti!""",
+
+    "fr": """Je ne suis pas sûr d'avoir compris votre question. Mais je suis là pour vous aider!
+
+Essayez de reformuler la question ou choisissez l'un de ces sujets:
+• 📋 Permis de séjour
+• 🏥 Santé
+• 💼 Travail
+• 🏠 Logement
+• 📚 Éducation
+
+Ou écrivez simplement ce dont vous avez besoin et je ferai de mon mieux pour vous aider!""",
+
+    "en": """I'm not sure I understood your question. But I'm here to help!
+
+Try rephrasing the question or choose one of these topics:
+• 📋 Residence permit
+• 🏥 Health
+• 💼 Work
+• 🏠 Housing
+• 📚 Education
+
+Or simply write what you need and I'll do my best to help you!"""
+}
+
+# Risposte in caso di errore tecnico
+ERROR_RESPONSES = {
+    "it": "Mi dispiace, ho avuto un problema tecnico. Puoi riprovare tra un momento?",
+    "fr": "Désolé, j'ai eu un problème technique. Pouvez-vous réessayer dans un moment?",
+    "en": "Sorry, I had a technical problem. Can you try again in a moment?"
+}
+
+def copy_response(response: Dict) -> Dict:
+    """Copia di una risposta in cache, incluse la lista delle fonti e le fonti strutturate"""
+    copied = dict(response)
+    copied["sources"] = [dict(source) if isinstance(source, dict) else source for source in response["sources"]]
+    return copied
+
+class ConversationEntry(NamedTuple):
+    """Messaggio salvato nello storico conversazione"""
+    timestamp: int  # nanosecondi Unix (time.time_ns)
+    message: str
+    category: str
+    language: str
+
 class JokkoAI:
     """Engine AI principale per JOKKO chatbot"""
     
@@ -25,6 +174,8 @@ class JokkoAI:
         self.load_knowledge_base()
         self.setup_response_patterns()
         self.conversation_history = {}
+        # Cache LRU delle risposte: (lingua, messaggio normalizzato) -> (lingua, categoria, risposta)
+        self.response_cache: OrderedDict = OrderedDict()
         
     def load_knowledge_base(self):
         """Carica base di conoscenza legale italiana"""
@@ -165,18 +316,11 @@ class JokkoAI:
     def detect_language(self, message: str) -> str:
         """Rileva lingua del messaggio (semplificata)"""
         # Implementazione base - in produzione usare libreria specializzata
-        italian_indicators = ["è", "perché", "così", "però", "già", "più"]
-        french_indicators = ["est", "être", "avec", "pour", "que", "où"]
-        english_indicators = ["the", "and", "for", "with", "this", "that"]
-        
-        message_lower = message.lower()
-        
-        scores = {
-            "it": sum(1 for word in italian_indicators if word in message_lower),
-            "fr": sum(1 for word in french_indicators if word in message_lower),
-            "en": sum(1 for word in english_indicators if word in message_lower)
-        }
-        
+        # Un'unica scansione regex: ogni indicatore trovato conta una volta
+        scores = dict.fromkeys(LANGUAGE_INDICATORS, 0)
+        for word in set(INDICATOR_PATTERN.findall(message.lower())):
+            scores[INDICATOR_LANGUAGE[word]] += 1
+            
         detected_lang = max(scores, key=scores.get)
         return detected_lang if scores[detected_lang] > 0 else "it"
         
@@ -196,43 +340,8 @@ class JokkoAI:
         
     def generate_greeting_response(self, language: str) -> Dict:
         """Genera risposta di saluto personalizzata"""
-        greetings = {
-            "it": """Ciao! Sono JOKKO AI 🥁, il tuo assistente personale per navigare la vita in Italia.
-            
-Sono qui per aiutarti con:
-• 📋 Permesso di soggiorno e documenti
-• 🏥 Sanità e assistenza medica  
-• 💼 Lavoro e diritti lavorativi
-• 🏠 Casa e residenza
-• 📚 Educazione e formazione
-
-Scrivi la tua domanda nella lingua che preferisci. Come posso aiutarti oggi?""",
-
-            "fr": """Salut! Je suis JOKKO AI 🥁, votre assistant personnel pour naviguer la vie en Italie.
-
-Je suis là pour vous aider avec:
-• 📋 Permis de séjour et documents
-• 🏥 Santé et assistance médicale
-• 💼 Travail et droits du travail
-• 🏠 Logement et résidence
-• 📚 Éducation et formation
-
-Écrivez votre question dans la langue que vous préférez. Comment puis-je vous aider aujourd'hui?""",
-
-            "en": """Hello! I'm JOKKO AI 🥁, your personal assistant for navigating life in Italy.
-
-I'm here to help you with:
-• 📋 Residence permits and documents
-• 🏥 Health and medical assistance
-• 💼 Work and labor rights
-• 🏠 Housing and residence
-• 📚 Education and training
-
-Write your question in your preferred language. How can I help you today?"""
-        }
-        
         return {
-            "response": greetings.get(language, greetings["it"]),
+            "response": GREETING_RESPONSES.get(language, GREETING_RESPONSES["it"]),
             "category": "greeting",
             "confidence": 1.0,
             "sources": []
@@ -240,37 +349,8 @@ Write your question in your preferred language. How can I help you today?"""
         
     def generate_emergency_response(self, language: str) -> Dict:
         """Genera risposta per emergenze"""
-        emergency_responses = {
-            "it": """🚨 EMERGENZA - NUMERI UTILI IMMEDIATI:
-
-• 🚑 Emergenza medica: 118
-• 🚔 Polizia: 113
-• 🚒 Vigili del Fuoco: 115
-• 🆘 Carabinieri: 112
-
-Se hai bisogno di assistenza immediata, chiama questi numeri. Per questioni non urgenti, continua pure a scrivermi e ti aiuterò con le informazioni che cerchi.""",
-
-            "fr": """🚨 URGENCE - NUMÉROS UTILES IMMÉDIATS:
-
-• 🚑 Urgence médicale: 118
-• 🚔 Police: 113
-• 🚒 Pompiers: 115
-• 🆘 Carabiniers: 112
-
-Si vous avez besoin d'une assistance immédiate, appelez ces numéros. Pour des questions non urgentes, continuez à m'écrire et je vous aiderai.""",
-
-            "en": """🚨 EMERGENCY - IMMEDIATE USEFUL NUMBERS:
-
-• 🚑 Medical emergency: 118
-• 🚔 Police: 113
-• 🚒 Fire department: 115
-• 🆘 Carabinieri: 112
-
-If you need immediate assistance, call these numbers. For non-urgent matters, continue writing to me and I'll help you."""
-        }
-        
         return {
-            "response": emergency_responses.get(language, emergency_responses["it"]),
+            "response": EMERGENCY_RESPONSES.get(language, EMERGENCY_RESPONSES["it"]),
             "category": "emergency",
             "confidence": 1.0,
             "sources": [{"type": "emergency_numbers", "official": True}]
@@ -301,13 +381,7 @@ If you need immediate assistance, call these numbers. For non-urgent matters, co
                 response_parts.append(f"• {link}")
                 
         # Messaggio finale
-        final_messages = {
-            "it": "\n\n💭 Hai altre domande su questo argomento? Scrivimi per maggiori dettagli!",
-            "fr": "\n\n💭 Avez-vous d'autres questions sur ce sujet? Écrivez-moi pour plus de détails!",
-            "en": "\n\n💭 Do you have other questions on this topic? Write to me for more details!"
-        }
-        
-        response_parts.append(final_messages.get(language, final_messages["it"]))
+        response_parts.append(CATEGORY_FINAL_MESSAGES.get(language, CATEGORY_FINAL_MESSAGES["it"]))
         
         return {
             "response": "\n".join(response_parts),
@@ -318,48 +392,37 @@ If you need immediate assistance, call these numbers. For non-urgent matters, co
         
     def generate_fallback_response(self, language: str) -> Dict:
         """Genera risposta di fallback quando non trova categoria"""
-        fallback_responses = {
-            "it": """Non sono sicuro di aver capito la tua domanda. Però sono qui per aiutarti! 
-
-Prova a riformulare la domanda o scegli uno di questi argomenti:
-• 📋 Permesso di soggiorno
-• 🏥 Sanità e salute
-• 💼 Lavoro
-• 🏠 Casa e residenza
-• 📚 Educazione
-
-Oppure scrivi semplicemente quello che ti serve e farò del mio meglio per aiutarti!""",
-
-            "fr": """Je ne suis pas sûr d'avoir compris votre question. Mais je suis là pour vous aider!
-
-Essayez de reformuler la question ou choisissez l'un de ces sujets:
-• 📋 Permis de séjour
-• 🏥 Santé
-• 💼 Travail
-• 🏠 Logement
-• 📚 Éducation
-
-Ou écrivez simplement ce dont vous avez besoin et je ferai de mon mieux pour vous aider!""",
-
-            "en": """I'm not sure I understood your question. But I'm here to help!
-
-Try rephrasing the question or choose one of these topics:
-• 📋 Residence permit
-• 🏥 Health
-• 💼 Work
-• 🏠 Housing
-• 📚 Education
-
-Or simply write what you need and I'll do my best to help you!"""
-        }
-        
         return {
-            "response": fallback_responses.get(language, fallback_responses["it"]),
+            "response": FALLBACK_RESPONSES.get(language, FALLBACK_RESPONSES["it"]),
             "category": "fallback",
             "confidence": 0.1,
             "sources": []
         }
         
+    def compose_response(self, message: str, language: str) -> Tuple[str, Optional[str], Dict]:
+        """Genera la risposta: (lingua, categoria da salvare nello storico o None, risposta)"""
+        
+        # Rileva lingua se non specificata correttamente
+        if language == "auto":
+            language = self.detect_language(message)
+            
+        # Verifica emergenza (priorità massima)
+        if self.is_emergency(message, language):
+            return language, None, self.generate_emergency_response(language)
+            
+        # Verifica saluto
+        if self.is_greeting(message, language):
+            return language, None, self.generate_greeting_response(language)
+            
+        # Classifica categoria della domanda
+        category, confidence = self.classify_query_category(message)
+        
+        # Genera risposta basata su categoria
+        if confidence > 0.2:  # Soglia di confidenza
+            return language, category, self.generate_category_response(category, language, confidence)
+        else:
+            return language, category, self.generate_fallback_response(language)
+            
     async def process_message(self, message: str, language: str = "it", user_id: Optional[str] = None) -> Dict:
         """Processa messaggio utente e genera risposta AI"""
         
@@ -367,50 +430,38 @@ Or simply write what you need and I'll do my best to help you!"""
             # Log della richiesta
             logger.info(f"Processing message: {message[:50]}... | Language: {language}")
             
-            # Rileva lingua se non specificata correttamente
-            if language == "auto":
-                language = self.detect_language(message)
-                
-            # Verifica emergenza (priorità massima)
-            if self.is_emergency(message, language):
-                return self.generate_emergency_response(language)
-                
-            # Verifica saluto
-            if self.is_greeting(message, language):
-                return self.generate_greeting_response(language)
-                
-            # Classifica categoria della domanda
-            category, confidence = self.classify_query_category(message)
+            # Messaggi identici (domande frequenti) vengono serviti dalla cache
+            cache_key = (language, message.strip().lower())
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self.response_cache.move_to_end(cache_key)
+            else:
+                cached = self.compose_response(message, language)
+                if len(cache_key[1]) <= RESPONSE_CACHE_MAX_LENGTH:
+                    self.response_cache[cache_key] = cached
+                    if len(self.response_cache) > RESPONSE_CACHE_SIZE:
+                        self.response_cache.popitem(last=False)
+            detected_language, category, response = cached
             
-            # Salva conversazione (opzionale)
-            if user_id:
-                if user_id not in self.conversation_history:
-                    self.conversation_history[user_id] = []
+            # Salva conversazione (opzionale); emergenze e saluti non vengono salvati
+            if user_id and category is not None:
+                history = self.conversation_history.get(user_id)
+                if history is None:
+                    # Solo gli ultimi messaggi: i più vecchi escono in O(1)
+                    history = self.conversation_history[user_id] = deque(maxlen=HISTORY_MAX_MESSAGES)
                     
-                self.conversation_history[user_id].append({
-                    "timestamp": datetime.now().isoformat(),
-                    "message": message,
-                    "category": category,
-                    "language": language
-                })
+                history.append(
+                    ConversationEntry(time.time_ns(), message, category, detected_language)
+                )
                 
-            # Genera risposta basata su categoria
-            if confidence > 0.2:  # Soglia di confidenza
-                return self.generate_category_response(category, language, confidence)
-            else:
-                return self.generate_fallback_response(language)
+            # Copia: il chiamante può modificare la risposta senza alterare la cache
+            return copy_response(response)
                 
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}")
             
-            error_responses = {
-                "it": "Mi dispiace, ho avuto un problema tecnico. Puoi riprovare tra un momento?",
-                "fr": "Désolé, j'ai eu un problème technique. Pouvez-vous réessayer dans un moment?",
-                "en": "Sorry, I had a technical problem. Can you try again in a moment?"
-            }
-            
             return {
-                "response": error_responses.get(language, error_responses["it"]),
+                "response": ERROR_RESPONSES.get(language, ERROR_RESPONSES["it"]),
                 "category": "error",
                 "confidence": 0.0,
                 "sources": []
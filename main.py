@@ -7,8 +7,32 @@ Server HTTP per deployment su piattaforme cloud
 import json
 import random
 import os
+import re
+import selectors
+import signal
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http import HTTPStatus
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse
+
+# orjson (opzionale) serializza direttamente in bytes UTF-8; altrimenti libreria standard
+try:
+    import orjson
+    
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+    
+    json_loads = json.loads
+
+# Dimensione massima accettata per il body delle richieste POST
+MAX_BODY_SIZE = 64 * 1024
 
 # Risposte mock complete per tutte le lingue
 MOCK_RESPONSES = {
@@ -86,192 +110,558 @@ MOCK_RESPONSES = {
     }
 }
 
+# Fonte ufficiale simulata per le categorie specifiche (una sola, per non appesantire)
+CHAT_SOURCES = [
+    {
+        "title": "Portale Immigrazione - Ministero dell'Interno",
+        "url": "https://www.interno.gov.it/it/temi/immigrazione-e-asilo",
+        "content": "Informazioni ufficiali su immigrazione e procedure"
+    }
+]
+
+# Template della risposta /api/chat: i campi vengono inseriti già serializzati in JSON
+CHAT_RESPONSE_TEMPLATE = b'{"response":%s,"language":%s,"sources":%s,"category":%s,"confidence":%.2f}'
+
+def resolve_responses(lang: str, category: str) -> tuple:
+    """Risolve (lingua, categoria) applicando i fallback verso l'italiano"""
+    if category in MOCK_RESPONSES[lang]:
+        responses = MOCK_RESPONSES[lang][category]
+    elif category in MOCK_RESPONSES["it"]:
+        # Se la categoria non esiste nella lingua selezionata, usa l'italiano
+        responses, lang = MOCK_RESPONSES["it"][category], "it"
+    else:
+        responses, lang, category = MOCK_RESPONSES["it"]["generale"], "it", "generale"
+    sources = CHAT_SOURCES if category != "generale" else []
+    # Testi delle risposte serializzati una volta sola: per richiesta si sceglie solo l'indice
+    responses_json = tuple(json_dumps(text) for text in responses)
+    return responses_json, len(responses_json), json_dumps(lang), json_dumps(sources), json_dumps(category)
+
+# Indice piatto (lingua, categoria) -> (risposte JSON, numero risposte, lingua, fonti, categoria),
+# con i fallback già risolti e i campi costanti già serializzati: una sola lookup per richiesta
+ALL_CATEGORIES = {category for categories in MOCK_RESPONSES.values() for category in categories}
+RESPONSE_INDEX = {
+    (lang, category): resolve_responses(lang, category)
+    for lang in MOCK_RESPONSES
+    for category in ALL_CATEGORIES
+}
+
+# Generatore pseudo-casuale per thread: le risposte mock non richiedono casualità crittografica
+thread_local = threading.local()
+
+def get_rng() -> random.Random:
+    """Restituisce il generatore casuale del thread corrente"""
+    rng = getattr(thread_local, 'rng', None)
+    if rng is None:
+        rng = thread_local.rng = random.Random()
+    return rng
+
+# Blocchi headers costanti (status line + CORS), completati per richiesta da Date e Content-Length
+CORS_HEADERS = (
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: Content-Type\r\n"
+)
+JSON_HEADERS_PREFIX = {
+    status: b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n" % (status, status.phrase.encode()) + CORS_HEADERS
+    for status in (HTTPStatus.OK, HTTPStatus.BAD_REQUEST, HTTPStatus.NOT_FOUND, HTTPStatus.INTERNAL_SERVER_ERROR,
+                   HTTPStatus.SERVICE_UNAVAILABLE)
+}
+OPTIONS_HEADERS_PREFIX = b"HTTP/1.1 200 OK\r\n" + CORS_HEADERS
+
+# Risposte GET costanti, serializzate una sola volta all'avvio
+HEALTH_RESPONSE_BYTES = json_dumps({
+    "status": "healthy",
+    "version": "1.0.0",
+    "components": {
+        "ai_engine": "operational",
+        "translator": "operational", 
+        "legal_processor": "operational"
+    },
+    "message": "JOKKO AI Backend is running! 🚀"
+})
+
+LANGUAGES_RESPONSE_BYTES = json_dumps({
+    "languages": {
+        "it": "Italiano",
+        "fr": "Français", 
+        "en": "English",
+        "wo": "Wolof",
+        "bm": "Bambara",
+        "ha": "Hausa",
+        "sw": "Swahili",
+        "ti": "Tigrinya",
+        "am": "Amarico",
+        "snk": "Soninke",
+        "ff": "Pulaar",
+        "ln": "Lingala"
+    }
+})
+
+GET_NOT_FOUND_BYTES = json_dumps({
+    "error": "Endpoint not found",
+    "available_endpoints": ["/api/health", "/api/languages", "/api/chat", "/api/translate"]
+})
+
+POST_NOT_FOUND_BYTES = json_dumps({"error": "Endpoint not found"})
+
+# Risposta completa per le connessioni rifiutate quando il server è saturo
+OVERLOADED_BYTES = json_dumps({"error": "Server sovraccarico, riprova tra poco"})
+OVERLOADED_RESPONSE = (
+    JSON_HEADERS_PREFIX[HTTPStatus.SERVICE_UNAVAILABLE]
+    + b"Retry-After: 1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n" % len(OVERLOADED_BYTES)
+    + OVERLOADED_BYTES
+)
+
+# Dispatch GET: path -> body precalcolato (nessun urlparse per richiesta)
+GET_ROUTES = {
+    '/api/health': HEALTH_RESPONSE_BYTES,
+    '/api/languages': LANGUAGES_RESPONSE_BYTES,
+}
+
+# Parole chiave per categoria, nell'ordine di priorità del rilevamento
+CATEGORY_KEYWORDS = [
+    ("permesso_soggiorno", ["permesso", "soggiorno", "questura", "documenti", "residence", "permit", "permis"]),
+    ("sanita", ["sanità", "medico", "ospedale", "salute", "cure", "health", "medical", "santé"]),
+    ("lavoro", ["lavoro", "lavorare", "contratto", "stipendio", "work", "job", "travail"]),
+    ("casa", ["casa", "affitto", "abitazione", "alloggio", "house", "housing", "logement"]),
+    ("educazione", ["scuola", "studio", "educazione", "università", "corso", "school", "education", "école"]),
+]
+
+# Un'unica regex compilata per categoria: una scansione in C invece di un ciclo Python per parola
+CATEGORY_PATTERNS = [
+    (category, re.compile("|".join(re.escape(word) for word in keywords)))
+    for category, keywords in CATEGORY_KEYWORDS
+]
+
+# Messaggi oltre questa lunghezza non vengono memorizzati nella cache delle categorie
+CATEGORY_CACHE_MAX_LENGTH = 512
+
+@lru_cache(maxsize=4096)
+def classify_normalized(message_lower: str) -> str:
+    """Categoria di un messaggio già normalizzato (risultato in cache)"""
+    for category, pattern in CATEGORY_PATTERNS:
+        if pattern.search(message_lower):
+            return category
+    return "generale"
+
 def detect_category(message: str) -> str:
     """Rileva la categoria della domanda"""
-    message_lower = message.lower()
+    message_lower = message.strip().lower()
     
-    if any(word in message_lower for word in ["permesso", "soggiorno", "questura", "documenti", "residence", "permit", "permis"]):
-        return "permesso_soggiorno"
-    elif any(word in message_lower for word in ["sanità", "medico", "ospedale", "salute", "cure", "health", "medical", "santé"]):
-        return "sanita"
-    elif any(word in message_lower for word in ["lavoro", "lavorare", "contratto", "stipendio", "work", "job", "travail"]):
-        return "lavoro"
-    elif any(word in message_lower for word in ["casa", "affitto", "abitazione", "alloggio", "house", "housing", "logement"]):
-        return "casa"
-    elif any(word in message_lower for word in ["scuola", "studio", "educazione", "università", "corso", "school", "education", "école"]):
-        return "educazione"
-    else:
-        return "generale"
+    if len(message_lower) > CATEGORY_CACHE_MAX_LENGTH:
+        return classify_normalized.__wrapped__(message_lower)
+    return classify_normalized(message_lower)
+
+# Body d'errore di /api/chat precalcolato fino al campo "error" (escluso)
+CHAT_ERROR_PREFIX = json_dumps({
+    "response": "Mi dispiace, ho avuto un problema nel processare la tua richiesta. Puoi riprovare? 🤔",
+    "language": "it",
+    "sources": [],
+    "category": "errore",
+    "confidence": 0.0
+})[:-1] + b',"error":'
+
+# Prefisso bandiera per la traduzione simulata
+TRANSLATION_FLAGS = {"it": "🇮🇹 ", "en": "🇬🇧 ", "fr": "🇫🇷 "}
+
+class InvalidPayload(ValueError):
+    """Payload del client non valido (JSON malformato o campi del tipo sbagliato)"""
+
+def load_payload(post_data: bytes, string_fields: tuple) -> dict:
+    """Decodifica il body JSON e verifica che sia un oggetto con i campi testuali attesi"""
+    try:
+        data = json_loads(post_data)
+    except ValueError as e:
+        raise InvalidPayload(str(e)) from e
+    if not isinstance(data, dict):
+        raise InvalidPayload("Il body deve essere un oggetto JSON")
+    for field in string_fields:
+        if field in data and not isinstance(data[field], str):
+            raise InvalidPayload(f"Il campo '{field}' deve essere una stringa")
+    return data
+
+def error_status(error: Exception) -> int:
+    """Status HTTP per un errore sollevato durante il processing di una richiesta"""
+    return HTTPStatus.BAD_REQUEST if isinstance(error, InvalidPayload) else HTTPStatus.INTERNAL_SERVER_ERROR
 
 class JokkoHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1: connessioni keep-alive riusate tra richieste successive
+    protocol_version = "HTTP/1.1"
+    # Chiude le connessioni keep-alive inattive
+    timeout = int(os.environ.get('JOKKO_KEEPALIVE_TIMEOUT', 5))
+    
+    # True quando la connessione keep-alive è inattiva e torna al server in attesa della prossima richiesta
+    parked = False
+
+    if os.environ.get('JOKKO_QUIET') == '1':
+        def log_request(self, code='-', size='-'):
+            """Access log disattivato: nessuna write su stderr per richiesta (gli errori restano)"""
+
+    def handle(self):
+        """Serve le richieste già arrivate; se la connessione resta aperta ma inattiva la parcheggia"""
+        self.parked = False
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if not self.has_pending_input():
+                # Il thread torna al pool: il server riprende la connessione quando è di nuovo leggibile
+                self.parked = not self.close_connection
+                return
+            self.handle_one_request()
+
+    def has_pending_input(self) -> bool:
+        """Controllo non bloccante: dati della prossima richiesta già nel buffer o sul socket"""
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            self.close_connection = True
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def resume(self):
+        """Riprende una connessione parcheggiata su cui è arrivata una nuova richiesta"""
+        try:
+            self.handle()
+        finally:
+            self.finish()
+
+    def finish(self):
+        if not self.parked:
+            super().finish()
+
+    def close(self):
+        """Chiude una connessione parcheggiata (stream e socket)"""
+        self.parked = False
+        try:
+            self.finish()
+        except OSError:
+            pass
+        self.server.shutdown_request(self.connection)
+
+    def send_json(self, body: bytes, status: int = HTTPStatus.OK):
+        """Invia una risposta JSON: headers precalcolati e body in un'unica write"""
+        self.log_request(status)
+        self.wfile.write(
+            JSON_HEADERS_PREFIX[status]
+            + (b"Connection: close\r\n" if self.close_connection else b"")
+            + b"Date: %s\r\nContent-Length: %d\r\n\r\n" % (self.date_time_string().encode(), len(body))
+            + body
+        )
+
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        self.log_request(200)
+        self.wfile.write(
+            OPTIONS_HEADERS_PREFIX
+            + b"Date: %s\r\nContent-Length: 0\r\n\r\n" % self.date_time_string().encode()
+        )
+
+    def request_path(self) -> str:
+        """Path della richiesta senza query string"""
+        return self.path.split('?', 1)[0]
 
     def do_GET(self):
-        parsed_path = urlparse(self.path)
-        
-        # Headers CORS
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
-        if parsed_path.path == '/api/health':
-            response = {
-                "status": "healthy",
-                "version": "1.0.0",
-                "components": {
-                    "ai_engine": "operational",
-                    "translator": "operational", 
-                    "legal_processor": "operational"
-                },
-                "message": "JOKKO AI Backend is running! 🚀"
-            }
-            self.wfile.write(json.dumps(response).encode())
+        body = GET_ROUTES.get(self.request_path())
+        if body is None:
+            self.send_json(GET_NOT_FOUND_BYTES, HTTPStatus.NOT_FOUND)
+        else:
+            self.send_json(body)
+
+    def handle_chat(self, post_data: bytes) -> tuple:
+        """POST /api/chat: risposta mock per categoria e lingua"""
+        try:
+            data = load_payload(post_data, ('message', 'language'))
+            message = data.get('message', '')
+            language = data.get('language', 'it')
+            
+            # Rileva categoria
+            category = detect_category(message)
+            
+            # Seleziona risposte (lingue non supportate: fallback all'italiano)
+            responses, count, language_json, sources_json, category_json = (
+                RESPONSE_INDEX.get((language, category)) or RESPONSE_INDEX[("it", category)]
+            )
+            rng = get_rng()
+            return HTTPStatus.OK, CHAT_RESPONSE_TEMPLATE % (
+                responses[rng.randrange(count)],
+                language_json,
+                sources_json,
+                category_json,
+                0.88 + rng.random() * 0.10
+            )
+            
+        except Exception as e:
+            # Solo il messaggio d'errore viene serializzato per richiesta
+            return error_status(e), CHAT_ERROR_PREFIX + json_dumps(str(e)) + b"}"
+
+    def handle_translate(self, post_data: bytes) -> tuple:
+        """POST /api/translate: traduzione simulata"""
+        try:
+            data = load_payload(post_data, ('text', 'target_language'))
+            text = data.get('text', '')
+            target_language = data.get('target_language', 'it')
+            
+            # Simulazione di traduzione più realistica: costruisce solo la stringa richiesta
+            flag = TRANSLATION_FLAGS.get(target_language)
+            translated_text = flag + text if flag else f"[{target_language}] {text}"
             
-        elif parsed_path.path == '/api/languages':
             response = {
-                "languages": {
-                    "it": "Italiano",
-                    "fr": "Français", 
-                    "en": "English",
-                    "wo": "Wolof",
-                    "bm": "Bambara",
-                    "ha": "Hausa",
-                    "sw": "Swahili",
-                    "ti": "Tigrinya",
-                    "am": "Amarico",
-                    "snk": "Soninke",
-                    "ff": "Pulaar",
-                    "ln": "Lingala"
-                }
+                "translation": translated_text,
+                "target_language": target_language,
+                "confidence": 0.92
             }
-            self.wfile.write(json.dumps(response).encode())
-        else:
-            response = {"error": "Endpoint not found", "available_endpoints": ["/api/health", "/api/languages", "/api/chat", "/api/translate"]}
-            self.wfile.write(json.dumps(response).encode())
+            
+            return HTTPStatus.OK, json_dumps(response)
+            
+        except Exception as e:
+            error_response = {"error": f"Errore traduzione: {str(e)}"}
+            return error_status(e), json_dumps(error_response)
+
+    def handle_post_not_found(self, post_data: bytes) -> tuple:
+        return HTTPStatus.NOT_FOUND, POST_NOT_FOUND_BYTES
+
+    # Dispatch POST: path -> metodo handler
+    POST_ROUTES = {
+        '/api/chat': handle_chat,
+        '/api/translate': handle_translate,
+    }
 
     def do_POST(self):
-        # Headers CORS
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        # Body chunked non supportato: senza chiudere, il body verrebbe letto come richiesta successiva
+        if 'Transfer-Encoding' in self.headers:
+            self.send_error(HTTPStatus.NOT_IMPLEMENTED, "Transfer-Encoding non supportato")
+            return
+        content_length_values = self.headers.get_all('Content-Length', [])
+        if not content_length_values:
+            # Fine del body non delimitata: la connessione non può essere riusata
+            self.close_connection = True
+            content_length = 0
+        else:
+            # Solo cifre ASCII e un solo header: int() accetterebbe "-5", "+5" o " 5" desincronizzando la connessione
+            value = content_length_values[0]
+            if len(content_length_values) > 1 or not (value.isascii() and value.isdigit()):
+                self.send_error(400, "Content-Length non valido")
+                return
+            content_length = int(value)
+        if content_length > MAX_BODY_SIZE:
+            self.send_error(413, "Richiesta troppo grande")
+            return
+        post_data = self.rfile.read(content_length) if content_length > 0 else b''
         
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
+        handler = self.POST_ROUTES.get(self.request_path(), JokkoHandler.handle_post_not_found)
         
-        parsed_path = urlparse(self.path)
+        # Gli headers partono solo quando il body è pronto (servono status e Content-Length)
+        status, body = handler(self, post_data)
+        self.send_json(body, status)
+
+class JokkoServer(HTTPServer):
+    """HTTPServer che gestisce le connessioni su un pool limitato di thread"""
+    
+    # Backlog ampio: i picchi di connessioni non vengono rifiutati
+    request_queue_size = 1024
+    # Più istanze indipendenti sulla stessa porta, bilanciate dal kernel
+    allow_reuse_port = os.environ.get('JOKKO_REUSEPORT') == '1'
+    
+    # Intervallo massimo tra due controlli delle connessioni keep-alive scadute
+    idle_poll_interval = 0.5
+
+    def __init__(self, server_address, handler_class, max_workers: int = 16, max_pending: int = 256,
+                 max_idle: int = 1024):
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jokko-http")
+        # Richieste in servizio + in coda: oltre il limite si risponde subito 503.
+        # Le connessioni keep-alive inattive non occupano slot né thread
+        self.slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self.max_idle = max_idle
+        # fd -> (handler, scadenza), in ordine di parcheggio (= ordine di scadenza)
+        self.idle_connections = OrderedDict()
+        self.idle_lock = threading.Lock()
+        # Creato in serve_forever: con il prefork ogni processo ha il proprio selector
+        self.idle_selector = None
+
+    def serve_forever(self, poll_interval=0.5):
+        self.idle_selector = selectors.DefaultSelector()
+        threading.Thread(target=self.watch_idle_connections, name="jokko-idle", daemon=True).start()
+        super().serve_forever(poll_interval)
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def get_request(self):
+        """Disattiva Nagle: le risposte JSON brevi partono senza attendere l'ACK"""
+        request, client_address = super().get_request()
+        request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return request, client_address
         
-        if parsed_path.path == '/api/chat':
+    def process_request(self, request, client_address):
+        """Affida la connessione a un worker invece di servirla nel thread di accept"""
+        if not self.slots.acquire(blocking=False):
+            self.reject_request(request)
+            return
+        self.executor.submit(self.process_request_thread, request, client_address)
+        
+    def reject_request(self, request):
+        """Server saturo: 503 immediato invece di accodare senza limite"""
+        try:
+            request.sendall(OVERLOADED_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+        
+    def process_request_thread(self, request, client_address):
+        handler = None
+        try:
+            handler = self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.slots.release()
+            self.park_or_close(request, handler)
+
+    def resume_request_thread(self, handler):
+        try:
+            handler.resume()
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+        finally:
+            self.slots.release()
+            self.park_or_close(handler.request, handler)
+
+    def park_or_close(self, request, handler):
+        """Dopo la risposta: connessione keep-alive inattiva in attesa, altrimenti chiusa"""
+        if handler is None or not handler.parked or self.idle_selector is None:
+            if handler is not None and handler.parked:
+                handler.close()
+            else:
+                self.shutdown_request(request)
+            return
+
+        oldest = None
+        with self.idle_lock:
+            # Troppe connessioni inattive: si chiude la più vecchia
+            if len(self.idle_connections) >= self.max_idle:
+                fd, (oldest, deadline) = self.idle_connections.popitem(last=False)
+                self.idle_selector.unregister(fd)
+            fd = request.fileno()
+            self.idle_connections[fd] = (handler, time.monotonic() + handler.timeout)
+            self.idle_selector.register(fd, selectors.EVENT_READ)
+        if oldest is not None:
+            oldest.close()
+
+    def watch_idle_connections(self):
+        """Thread: riconsegna al pool le connessioni keep-alive su cui arriva una nuova richiesta"""
+        while True:
             try:
-                data = json.loads(post_data.decode())
-                message = data.get('message', '')
-                language = data.get('language', 'it')
-                
-                # Rileva categoria
-                category = detect_category(message)
-                
-                # Seleziona lingua (fallback all'italiano)
-                if language not in MOCK_RESPONSES:
-                    language = "it"
-                
-                # Se la categoria non esiste nella lingua selezionata, usa l'italiano
-                if category not in MOCK_RESPONSES[language]:
-                    if category in MOCK_RESPONSES["it"]:
-                        responses = MOCK_RESPONSES["it"][category]
-                        language = "it"  # Cambia lingua per la risposta
-                    else:
-                        responses = MOCK_RESPONSES["it"]["generale"]
-                        category = "generale"
-                        language = "it"
+                ready = self.idle_selector.select(self.idle_poll_interval)
+            except (OSError, ValueError):
+                # Selector chiuso da server_close
+                return
+
+            resumed, expired = [], []
+            now = time.monotonic()
+            with self.idle_lock:
+                for key, _ in ready:
+                    entry = self.idle_connections.pop(key.fd, None)
+                    if entry is not None:
+                        self.idle_selector.unregister(key.fd)
+                        resumed.append(entry[0])
+                # Keep-alive timeout: le voci sono in ordine di scadenza
+                while self.idle_connections:
+                    fd, (handler, deadline) = next(iter(self.idle_connections.items()))
+                    if deadline > now:
+                        break
+                    del self.idle_connections[fd]
+                    self.idle_selector.unregister(fd)
+                    expired.append(handler)
+
+            for handler in expired:
+                handler.close()
+            for handler in resumed:
+                if self.slots.acquire(blocking=False):
+                    self.executor.submit(self.resume_request_thread, handler)
                 else:
-                    responses = MOCK_RESPONSES[language][category]
-                
-                response_text = random.choice(responses)
-                
-                # Simula fonti per alcune categorie
-                sources = []
-                if category != "generale":
-                    sources = [
-                        {
-                            "title": "Portale Immigrazione - Ministero dell'Interno",
-                            "url": "https://www.interno.gov.it/it/temi/immigrazione-e-asilo",
-                            "content": "Informazioni ufficiali su immigrazione e procedure"
-                        },
-                        {
-                            "title": "Servizio Sanitario Nazionale",
-                            "url": "https://www.salute.gov.it/",
-                            "content": "Informazioni su sanità e diritti sanitari"
-                        }
-                    ]
-                
-                response = {
-                    "response": response_text,
-                    "language": language,
-                    "sources": sources[:1] if sources else [],  # Limitiamo a 1 fonte per non appesantire
-                    "category": category,
-                    "confidence": round(random.uniform(0.88, 0.98), 2)
-                }
-                
-                self.wfile.write(json.dumps(response).encode())
-                
-            except Exception as e:
-                error_response = {
-                    "response": "Mi dispiace, ho avuto un problema nel processare la tua richiesta. Puoi riprovare? 🤔",
-                    "language": "it",
-                    "sources": [],
-                    "category": "errore",
-                    "confidence": 0.0,
-                    "error": str(e)
-                }
-                self.wfile.write(json.dumps(error_response).encode())
-                
-        elif parsed_path.path == '/api/translate':
+                    handler.parked = False
+                    try:
+                        handler.finish()
+                    except OSError:
+                        pass
+                    self.reject_request(handler.request)
+
+    def server_close(self):
+        super().server_close()
+        if self.idle_selector is not None:
+            with self.idle_lock:
+                idle = [handler for handler, _ in self.idle_connections.values()]
+                self.idle_connections.clear()
+                self.idle_selector.close()
+            for handler in idle:
+                handler.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def serve_workers(server: JokkoServer, workers: int):
+    """Prefork: i processi figli accettano connessioni dallo stesso socket in ascolto"""
+    # Le costanti costruite all'import sono condivise copy-on-write tra i worker
+    children = set()
+    stopping = False
+    
+    def spawn_worker():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
             try:
-                data = json.loads(post_data.decode())
-                text = data.get('text', '')
-                target_language = data.get('target_language', 'it')
-                
-                # Simulazione di traduzione più realistica
-                translations = {
-                    "it": "🇮🇹 " + text,
-                    "en": "🇬🇧 " + text,
-                    "fr": "🇫🇷 " + text
-                }
-                
-                translated_text = translations.get(target_language, f"[{target_language}] {text}")
-                
-                response = {
-                    "translation": translated_text,
-                    "target_language": target_language,
-                    "confidence": 0.92
-                }
-                
-                self.wfile.write(json.dumps(response).encode())
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os._exit(0)
+        children.add(pid)
+        
+    def stop_children(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
                 
-            except Exception as e:
-                error_response = {"error": f"Errore traduzione: {str(e)}"}
-                self.wfile.write(json.dumps(error_response).encode())
-        else:
-            error_response = {"error": "Endpoint not found"}
-            self.wfile.write(json.dumps(error_response).encode())
+    for _ in range(workers):
+        spawn_worker()
+    signal.signal(signal.SIGTERM, stop_children)
+    try:
+        while children:
+            pid, status = os.wait()
+            children.discard(pid)
+            if not stopping:
+                # Worker terminato inaspettatamente: viene sostituito (con una breve pausa contro i crash in loop)
+                print(f"⚠️ Worker {pid} terminato (exit code {os.waitstatus_to_exitcode(status)}), riavvio...")
+                time.sleep(1)
+                if not stopping:
+                    spawn_worker()
+    except KeyboardInterrupt:
+        # Ctrl+C arriva a tutto il gruppo di processi: attende solo i figli ancora attivi
+        stopping = True
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        raise
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
     host = os.environ.get('HOST', '0.0.0.0')
+    threads = int(os.environ.get('JOKKO_THREADS', 16))
+    max_pending = int(os.environ.get('JOKKO_MAX_PENDING', 256))
+    max_idle = int(os.environ.get('JOKKO_MAX_IDLE', 1024))
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    if not hasattr(os, 'fork'):
+        workers = 1
     
     print("🚀 Avvio JOKKO AI Backend Server...")
-    print(f"🌐 Server in ascolto su http://{host}:{port}")
+    print(f"🌐 Server in ascolto su http://{host}:{port} ({workers} processi x {threads} thread)")
     print("📋 Endpoint disponibili:")
     print("   GET  /api/health")
     print("   GET  /api/languages") 
@@ -279,9 +669,13 @@ if __name__ == '__main__':
     print("   POST /api/translate")
     print("🎯 JOKKO AI ready to help migrants in Italy!")
     
-    server = HTTPServer((host, port), JokkoHandler)
+    server = JokkoServer((host, port), JokkoHandler, max_workers=threads, max_pending=max_pending,
+                         max_idle=max_idle)
     try:
-        server.serve_forever()
+        if workers > 1:
+            serve_workers(server, workers)
+        else:
+            server.serve_forever()
     except KeyboardInterrupt:
         print("\n⛔ Server fermato dall'utente")
         server.server_close()
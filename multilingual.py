@@ -9,6 +9,8 @@ Data: 2025-06-20
 
 import asyncio
 import logging
+import time
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple
 import json
 import re
@@ -17,11 +19,49 @@ import re
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cache traduzioni: numero massimo di voci, durata in secondi e lunghezza massima dei testi memorizzati
+TRANSLATION_CACHE_SIZE = 4096
+TRANSLATION_CACHE_TTL = 3600
+TRANSLATION_CACHE_MAX_LENGTH = 512
+
+# Traduzioni contemporanee massime in batch_translate
+BATCH_MAX_CONCURRENCY = 16
+
+# Nomi nativi delle lingue supportate
+NATIVE_LANGUAGE_NAMES = {
+    'it': 'Italiano',
+    'fr': 'Français', 
+    'en': 'English',
+    'wo': 'Wolof',
+    'bm': 'Bamanankan',
+    'ha': 'هَرْشَن هَوْسَ',
+    'sw': 'Kiswahili',
+    'ti': 'ትግርኛ',
+    'am': 'አማርኛ',
+    'snk': 'Soninkanxanne',
+    'ff': 'Fulfulde',
+    'ln': 'Lingála'
+}
+
 class MultilingualTranslator:
     """Sistema traduzione multilingue per JOKKO AI"""
     
-    def __init__(self, supported_languages: Dict[str, str]):
+    def __init__(self, supported_languages: Dict[str, str],
+                 cache_size: int = TRANSLATION_CACHE_SIZE, cache_ttl: float = TRANSLATION_CACHE_TTL):
         self.supported_languages = supported_languages
+        # Cache LRU con scadenza: (testo, lingua destinazione, lingua sorgente) -> (scadenza, traduzione)
+        self.translation_cache: OrderedDict = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        # Le lingue supportate non cambiano: la lista viene costruita una sola volta
+        self.supported_languages_list = [
+            {
+                'code': code,
+                'name': name,
+                'native_name': NATIVE_LANGUAGE_NAMES.get(code, name)
+            }
+            for code, name in supported_languages.items()
+        ]
         self.setup_translation_mappings()
         self.setup_basic_dictionaries()
         
@@ -42,6 +82,31 @@ class MultilingualTranslator:
             'ln': 'ln'     # Lingala
         }
         
+        # Traduzioni simulate: lingua destinazione -> (parola chiave, testo sorgente, sostituzione)
+        self.simulation_rules = {
+            'en': ('permesso', 'permesso di soggiorno', 'residence permit'),
+            'fr': ('permesso', 'permesso di soggiorno', 'permis de séjour')
+        }
+        
+        # Pattern linguistici caratteristici per il rilevamento della lingua
+        self.language_patterns = {
+            'it': ['che', 'per', 'con', 'del', 'una', 'sono', 'dove', 'come'],
+            'fr': ['que', 'pour', 'avec', 'des', 'une', 'suis', 'où', 'comment'],
+            'en': ['that', 'for', 'with', 'the', 'and', 'are', 'where', 'how'],
+            'wo': ['ku', 'ak', 'ci', 'la', 'nga', 'am', 'fan', 'naka'],
+            'ha': ['da', 'mai', 'na', 'ta', 'ka', 'ba', 'ina', 'yaya'],
+            'sw': ['na', 'wa', 'ya', 'za', 'la', 'ni', 'wapi', 'jinsi']
+        }
+        
+        # Insieme di parole per lingua, e un'unica regex per trovarle tutte in una scansione
+        self.language_marker_sets = {
+            lang: frozenset(words) for lang, words in self.language_patterns.items()
+        }
+        all_markers = frozenset().union(*self.language_marker_sets.values())
+        self.marker_pattern = re.compile(
+            r"\b(?:" + "|".join(re.escape(word) for word in sorted(all_markers, key=len, reverse=True)) + r")\b"
+        )
+        
     def setup_basic_dictionaries(self):
         """Configura dizionari base per traduzioni essenziali"""
         
@@ -176,36 +241,35 @@ class MultilingualTranslator:
             }
         }
         
-    def detect_language_simple(self, text: str) -> str:
-        """Rileva lingua con metodo semplificato basato su pattern"""
-        
-        text_lower = text.lower()
-        
-        # Pattern linguistici caratteristici
-        patterns = {
-            'it': ['che', 'per', 'con', 'del', 'una', 'sono', 'dove', 'come'],
-            'fr': ['que', 'pour', 'avec', 'des', 'une', 'suis', 'où', 'comment'],
-            'en': ['that', 'for', 'with', 'the', 'and', 'are', 'where', 'how'],
-            'wo': ['ku', 'ak', 'ci', 'la', 'nga', 'am', 'fan', 'naka'],
-            'ha': ['da', 'mai', 'na', 'ta', 'ka', 'ba', 'ina', 'yaya'],
-            'sw': ['na', 'wa', 'ya', 'za', 'la', 'ni', 'wapi', 'jinsi']
+        # Indice termine -> traduzioni e unica regex per tutti i termini, come parole intere
+        # e rispettando maiuscole/minuscole; i termini più lunghi vengono provati per primi
+        self.term_index = {
+            source_term: translations
+            for translations in self.essential_terms.values()
+            for source_term in translations.values()
         }
+        self.term_pattern = re.compile(
+            r"\b(?:" + "|".join(re.escape(term) for term in sorted(self.term_index, key=len, reverse=True)) + r")\b"
+        )
         
-        scores = {}
-        for lang, words in patterns.items():
-            score = sum(1 for word in words if word in text_lower)
-            scores[lang] = score
+    def detect_language_simple(self, text: str, text_lower: Optional[str] = None) -> str:
+        """Rileva lingua con metodo semplificato basato su pattern"""
+        
+        if text_lower is None:
+            text_lower = text.lower()
             
-        # Trova lingua con score più alto
-        if scores:
-            detected = max(scores, key=scores.get)
-            if scores[detected] > 0:
-                return detected
-                
-        return 'it'  # Default italiano
+        # Ogni parola caratteristica conta una volta, come parola intera
+        found = frozenset(self.marker_pattern.findall(text_lower))
+        if not found:
+            return 'it'  # Default italiano
+            
+        # Score = cardinalità dell'intersezione con le parole di ciascuna lingua
+        scores = {lang: len(found & markers) for lang, markers in self.language_marker_sets.items()}
+        return max(scores, key=scores.get)
         
-    async def translate_with_fallback(self, text: str, target_lang: str, source_lang: str = "auto") -> str:
-        """Traduce testo con sistema di fallback"""
+    async def translate_with_fallback(self, text: str, target_lang: str, source_lang: str = "auto",
+                                      text_lower: Optional[str] = None) -> Optional[str]:
+        """Traduce testo con sistema di fallback (None se la traduzione fallisce)"""
         
         try:
             # Prova traduzione con dizionario interno per termini essenziali
@@ -214,37 +278,37 @@ class MultilingualTranslator:
                 return internal_translation
                 
             # Simula traduzione (in produzione usare Google Translate API)
-            return await self.simulate_translation(text, target_lang, source_lang)
+            return await self.simulate_translation(text, target_lang, source_lang, text_lower)
             
         except Exception as e:
             logger.error(f"Translation error: {str(e)}")
-            return text  # Ritorna testo originale se traduzione fallisce
+            return None  # Il chiamante ripiega sul testo originale senza metterlo in cache
             
     def translate_essential_terms(self, text: str, target_lang: str) -> str:
         """Traduce termini essenziali usando dizionario interno"""
         
-        translated_text = text
-        
-        for term_key, translations in self.essential_terms.items():
-            for source_lang, source_term in translations.items():
-                if source_term.lower() in text.lower():
-                    target_term = translations.get(target_lang, source_term)
-                    translated_text = translated_text.replace(source_term, target_term)
-                    
-        return translated_text
+        def replace_term(match):
+            source_term = match.group(0)
+            return self.term_index[source_term].get(target_lang, source_term)
+            
+        return self.term_pattern.sub(replace_term, text)
         
-    async def simulate_translation(self, text: str, target_lang: str, source_lang: str) -> str:
+    async def simulate_translation(self, text: str, target_lang: str, source_lang: str,
+                                   text_lower: Optional[str] = None) -> str:
         """Simula traduzione (placeholder per API reale)"""
         
         # Simulazione base - in produzione integrare con Google Translate
         if target_lang == source_lang:
             return text
             
-        # Simulazioni per test
-        if target_lang == 'en' and 'permesso' in text.lower():
-            return text.replace('permesso di soggiorno', 'residence permit')
-        elif target_lang == 'fr' and 'permesso' in text.lower():
-            return text.replace('permesso di soggiorno', 'permis de séjour')
+        # Simulazioni per test: una sola lookup per lingua destinazione
+        rule = self.simulation_rules.get(target_lang)
+        if rule is not None:
+            keyword, source_term, replacement = rule
+            if text_lower is None:
+                text_lower = text.lower()
+            if keyword in text_lower:
+                return text.replace(source_term, replacement)
             
         # Aggiunge indicatore di traduzione per debug
         return f"[{target_lang.upper()}] {text}"
@@ -260,16 +324,44 @@ class MultilingualTranslator:
             logger.warning(f"Lingua non supportata: {target_lang}")
             return text
             
-        # Rileva lingua sorgente se necessario
+        # Lingua sorgente esplicita uguale alla destinazione: niente rilevamento, cache o traduzione
+        if source_lang == target_lang:
+            return text
+            
+        # Testi ripetuti (domande frequenti) vengono serviti dalla cache; i testi lunghi non vengono memorizzati
+        cacheable = len(text) <= TRANSLATION_CACHE_MAX_LENGTH
+        cache_key = (text, target_lang, source_lang)
+        now = time.monotonic()
+        cached = self.translation_cache.get(cache_key) if cacheable else None
+        if cached is not None:
+            expires_at, translation = cached
+            if expires_at > now:
+                self.translation_cache.move_to_end(cache_key)
+                return translation
+            del self.translation_cache[cache_key]
+            
+        # Rileva lingua sorgente se necessario; il minuscolo calcolato qui viene
+        # riusato dalla simulazione, altrimenti è calcolato solo se serve
+        text_lower = None
         if source_lang == "auto":
-            source_lang = self.detect_language_simple(text)
+            text_lower = text.lower()
+            source_lang = self.detect_language_simple(text, text_lower)
             
         # Se lingue sono uguali, ritorna testo originale
         if source_lang == target_lang:
-            return text
+            translation = text
+        else:
+            # Esegui traduzione
+            translation = await self.translate_with_fallback(text, target_lang, source_lang, text_lower)
+            if translation is None:
+                # Errore (anche transitorio): testo originale, senza fissarlo in cache per tutto il TTL
+                return text
             
-        # Esegui traduzione
-        return await self.translate_with_fallback(text, target_lang, source_lang)
+        if cacheable:
+            self.translation_cache[cache_key] = (now + self.cache_ttl, translation)
+            if len(self.translation_cache) > self.cache_size:
+                self.translation_cache.popitem(last=False)
+        return translation
         
     def get_ui_phrase(self, phrase_key: str, language: str) -> str:
         """Ottieni frase UI tradotta"""
@@ -279,38 +371,34 @@ class MultilingualTranslator:
                    self.ui_phrases[phrase_key].get('it', phrase_key))
         return phrase_key
         
-    async def batch_translate(self, texts: List[str], target_lang: str, source_lang: str = "auto") -> List[str]:
+    async def batch_translate(self, texts: List[str], target_lang: str, source_lang: str = "auto",
+                              max_concurrency: int = BATCH_MAX_CONCURRENCY) -> List[str]:
         """Traduce multipli testi in parallelo"""
         
-        tasks = [self.translate(text, target_lang, source_lang) for text in texts]
-        return await asyncio.gather(*tasks)
+        # Al massimo max_concurrency traduzioni contemporanee
+        semaphore = asyncio.Semaphore(max_concurrency)
         
-    def get_supported_languages_list(self) -> List[Dict[str, str]]:
-        """Ottieni lista lingue supportate con nomi nativi"""
+        async def bounded_translate(text: str) -> str:
+            async with semaphore:
+                return await self.translate(text, target_lang, source_lang)
+                
+        # Testi ripetuti nel batch vengono tradotti una sola volta
+        unique_texts = list(dict.fromkeys(texts))
+        results = await asyncio.gather(*(bounded_translate(text) for text in unique_texts), return_exceptions=True)
         
-        native_names = {
-            'it': 'Italiano',
-            'fr': 'Français', 
-            'en': 'English',
-            'wo': 'Wolof',
-            'bm': 'Bamanankan',
-            'ha': 'هَرْشَن هَوْسَ',
-            'sw': 'Kiswahili',
-            'ti': 'ትግርኛ',
-            'am': 'አማርኛ',
-            'snk': 'Soninkanxanne',
-            'ff': 'Fulfulde',
-            'ln': 'Lingála'
-        }
+        # Un errore su un testo non fa fallire il batch: si restituisce l'originale
+        translations = {}
+        for text, result in zip(unique_texts, results):
+            if isinstance(result, Exception):
+                logger.error(f"Batch translation error: {str(result)}")
+                result = text
+            translations[text] = result
+        return [translations[text] for text in texts]
         
-        return [
-            {
-                'code': code,
-                'name': name,
-                'native_name': native_names.get(code, name)
-            }
-            for code, name in self.supported_languages.items()
-        ]
+    def get_supported_languages_list(self) -> List[Dict[str, str]]:
+        """Ottieni lista lingue supportate con nomi nativi"""
+        # Copie: il chiamante può modificarle senza alterare la lista condivisa
+        return [dict(language) for language in self.supported_languages_list]
 
 # Test del traduttore
 if __name__ == "__main__":
@@ -4,12 +4,23 @@ JOKKO AI - Server Backend Semplificato per Demo
 FastAPI server con risposte mock per dimostrare l'integrazione frontend
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist
 from typing import Dict, List, Optional
-import uvicorn
+import json
+import os
 import random
+import re
+
+# orjson (opzionale) serializza direttamente in bytes UTF-8; altrimenti libreria standard
+try:
+    import orjson
+    
+    json_dumps = orjson.dumps
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
 class ChatRequest(BaseModel):
     message: str
@@ -78,6 +89,28 @@ MOCK_RESPONSES = {
     }
 }
 
+# Fonti simulate, condivise da tutte le risposte non generali
+CHAT_SOURCES = [
+    {
+        "title": "Portale Immigrazione - Ministero dell'Interno",
+        "url": "https://www.interno.gov.it/it/temi/immigrazione-e-asilo",
+        "content": "Informazioni ufficiali su immigrazione e procedure"
+    }
+]
+
+# Risposte indicizzate per (lingua, categoria); le combinazioni mancanti
+# ricadono sulle risposte generali in italiano come nella ricerca originale
+CATEGORIES = ("permesso_soggiorno", "sanita", "lavoro", "casa", "educazione", "generale")
+RESPONSE_INDEX = {
+    (language, category): tuple(responses.get(category, MOCK_RESPONSES["it"]["generale"]))
+    for language, responses in MOCK_RESPONSES.items()
+    for category in CATEGORIES
+}
+
+# Generatore dedicato alla scelta delle risposte mock (un solo event loop, nessun lock)
+RNG = random.Random()
+choose_response = RNG.choice
+
 app = FastAPI(
     title="JOKKO AI",
     description="Chatbot AI multilingue per migranti africani in Italia",
@@ -93,87 +126,117 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.get("/api/health")
-async def health_check():
-    """Health check sistema"""
-    return {
-        "status": "healthy",
-        "version": "1.0.0",
-        "components": {
-            "ai_engine": "operational",
-            "translator": "mock", 
-            "legal_processor": "mock"
-        }
+# Risposte statiche serializzate una sola volta all'avvio
+HEALTH_RESPONSE_BYTES = json_dumps({
+    "status": "healthy",
+    "version": "1.0.0",
+    "components": {
+        "ai_engine": "operational",
+        "translator": "mock", 
+        "legal_processor": "mock"
     }
+})
 
-@app.get("/api/languages")
-async def get_supported_languages():
-    """Ottieni lingue supportate"""
-    return {
-        "languages": {
-            "it": "Italiano",
-            "fr": "Français", 
-            "en": "English",
-            "wo": "Wolof",
-            "bm": "Bambara",
-            "ha": "Hausa",
-            "sw": "Swahili",
-            "ti": "Tigrinya",
-            "am": "Amarico",
-            "snk": "Soninke",
-            "ff": "Pulaar",
-            "ln": "Lingala"
-        }
+LANGUAGES_RESPONSE_BYTES = json_dumps({
+    "languages": {
+        "it": "Italiano",
+        "fr": "Français", 
+        "en": "English",
+        "wo": "Wolof",
+        "bm": "Bambara",
+        "ha": "Hausa",
+        "sw": "Swahili",
+        "ti": "Tigrinya",
+        "am": "Amarico",
+        "snk": "Soninke",
+        "ff": "Pulaar",
+        "ln": "Lingala"
     }
+})
+
+# Route Starlette semplici: saltano la risoluzione delle dipendenze di FastAPI
+async def health_check(request):
+    """Health check sistema"""
+    # Response nuova per richiesta: i middleware (es. CORS) modificano gli header sul posto
+    return Response(content=HEALTH_RESPONSE_BYTES, media_type="application/json")
+
+async def get_supported_languages(request):
+    """Ottieni lingue supportate"""
+    return Response(content=LANGUAGES_RESPONSE_BYTES, media_type="application/json")
+
+app.add_route("/api/health", health_check, methods=["GET"])
+app.add_route("/api/languages", get_supported_languages, methods=["GET"])
+
+# Parole chiave per categoria, nell'ordine di priorità del rilevamento
+CATEGORY_KEYWORDS = {
+    "permesso_soggiorno": ("permesso", "soggiorno", "questura", "documenti"),
+    "sanita": ("sanità", "medico", "ospedale", "salute", "cure"),
+    "lavoro": ("lavoro", "lavorare", "contratto", "stipendio"),
+    "casa": ("casa", "affitto", "abitazione", "alloggio"),
+    "educazione": ("scuola", "studio", "educazione", "università", "corso"),
+}
+
+# Un'unica regex compilata per categoria: stessa ricerca per sottostringa del ciclo originale
+# (anche le parole composte o flesse che contengono una parola chiave) in una sola scansione in C
+CATEGORY_PATTERNS = [
+    (category, re.compile("|".join(re.escape(word) for word in keywords)))
+    for category, keywords in CATEGORY_KEYWORDS.items()
+]
 
 def detect_category(message: str) -> str:
     """Rileva la categoria della domanda"""
     message_lower = message.lower()
     
-    if any(word in message_lower for word in ["permesso", "soggiorno", "questura", "documenti"]):
-        return "permesso_soggiorno"
-    elif any(word in message_lower for word in ["sanità", "medico", "ospedale", "salute", "cure"]):
-        return "sanita"
-    elif any(word in message_lower for word in ["lavoro", "lavorare", "contratto", "stipendio"]):
-        return "lavoro"
-    elif any(word in message_lower for word in ["casa", "affitto", "abitazione", "alloggio"]):
-        return "casa"
-    elif any(word in message_lower for word in ["scuola", "studio", "educazione", "università", "corso"]):
-        return "educazione"
-    else:
-        return "generale"
+    for category, pattern in CATEGORY_PATTERNS:
+        if pattern.search(message_lower):
+            return category
+    return "generale"
+
+# Numero massimo di messaggi accettati da /api/chat/batch
+MAX_BATCH_SIZE = 100
+
+def build_chat_response(chat_request: ChatRequest) -> dict:
+    """Costruisce la risposta mock (forma di ChatResponse) per un messaggio"""
+    # Rileva categoria
+    category = detect_category(chat_request.message)
+    
+    # Seleziona lingua (fallback all'italiano)
+    language = chat_request.language if chat_request.language in MOCK_RESPONSES else "it"
+    
+    # Seleziona risposta appropriata
+    responses = RESPONSE_INDEX[(language, category)]
+    response_text = choose_response(responses)
+    
+    # Simula fonti per alcune categorie
+    sources = CHAT_SOURCES if category != "generale" else []
+    
+    return {
+        "response": response_text,
+        "language": language,
+        "sources": sources,
+        "category": category,
+        "confidence": 0.95
+    }
 
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_endpoint(chat_request: ChatRequest):
     """Endpoint principale per chat AI"""
     try:
-        # Rileva categoria
-        category = detect_category(chat_request.message)
+        # Il dict ha già la forma di ChatResponse: serializzato direttamente,
+        # senza la nuova validazione di response_model (usato solo per lo schema OpenAPI)
+        return Response(content=json_dumps(build_chat_response(chat_request)), media_type="application/json")
         
-        # Seleziona lingua (fallback all'italiano)
-        language = chat_request.language if chat_request.language in MOCK_RESPONSES else "it"
-        
-        # Seleziona risposta appropriata
-        responses = MOCK_RESPONSES[language].get(category, MOCK_RESPONSES["it"]["generale"])
-        response_text = random.choice(responses)
-        
-        # Simula fonti per alcune categorie
-        sources = []
-        if category != "generale":
-            sources = [
-                {
-                    "title": "Portale Immigrazione - Ministero dell'Interno",
-                    "url": "https://www.interno.gov.it/it/temi/immigrazione-e-asilo",
-                    "content": "Informazioni ufficiali su immigrazione e procedure"
-                }
-            ]
-        
-        return ChatResponse(
-            response=response_text,
-            language=language,
-            sources=sources,
-            category=category,
-            confidence=0.95
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Errore nel processing: {str(e)}")
+
+@app.post("/api/chat/batch", response_model=List[ChatResponse])
+async def chat_batch_endpoint(chat_requests: conlist(ChatRequest, max_length=MAX_BATCH_SIZE)):
+    """Elabora più messaggi in una sola richiesta (lotti troppo grandi: 422 in validazione)"""
+    try:
+        # Una sola serializzazione per l'intero lotto
+        return Response(
+            content=json_dumps([build_chat_response(chat_request) for chat_request in chat_requests]),
+            media_type="application/json"
         )
         
     except Exception as e:
@@ -189,11 +252,24 @@ async def translate_text(text: str, target_language: str, source_language: str =
     }
 
 if __name__ == "__main__":
+    port = int(os.environ.get("PORT", 8000))
+    host = os.environ.get("HOST", "0.0.0.0")
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    
+    # uvicorn serve solo per l'avvio diretto: chi importa l'app non ne paga il costo
+    import uvicorn
+    
     print("🚀 Avvio JOKKO AI Backend (versione semplificata)...")
+    # loop/http "auto" usano uvloop e httptools quando installati (uvicorn[standard]);
+    # con più worker uvicorn richiede l'app come stringa di import
     uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=8000,
+        "simple_main:app" if workers > 1 else app,
+        host=host,
+        port=port,
         reload=False,
-        log_level="info"
+        workers=workers,
+        loop="auto",
+        http="auto",
+        log_level="info",
+        access_log=os.environ.get("JOKKO_QUIET") != "1"
     )
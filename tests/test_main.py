@@ -0,0 +1,214 @@
+import socket
+import threading
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def make_server():
+    servers = []
+    
+    def make_server(handler_class=main.JokkoHandler, **kwargs):
+        server = main.JokkoServer(("127.0.0.1", 0), handler_class, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+        
+    yield make_server
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def server(make_server):
+    return make_server()
+
+
+def exchange(server, data: bytes, timeout: float = 1.0) -> tuple:
+    """Invia byte grezzi; ritorna (risposta letta, True se il server ha chiuso la connessione)"""
+    with socket.create_connection(server.server_address) as sock:
+        sock.sendall(data)
+        sock.settimeout(timeout)
+        response = b""
+        try:
+            while chunk := sock.recv(65536):
+                response += chunk
+        except socket.timeout:
+            return response, False
+    return response, True
+
+
+LANGUAGES_REQUEST = b"GET /api/languages HTTP/1.1\r\nHost: x\r\n\r\n"
+
+
+@pytest.mark.parametrize("value", [b"-5", b"+5", b"5x", b"\xc2\xb2"])
+def test_post_rejects_malformed_content_length(server, value):
+    response, closed = exchange(
+        server,
+        b"POST /api/chat HTTP/1.1\r\nHost: x\r\nContent-Length: " + value + b"\r\n\r\n" + LANGUAGES_REQUEST,
+    )
+    
+    assert response.startswith(b"HTTP/1.1 400")
+    assert response.count(b"HTTP/1.1 ") == 1
+    assert closed
+
+
+def test_post_rejects_duplicate_content_length(server):
+    response, closed = exchange(
+        server,
+        b"POST /api/chat HTTP/1.1\r\nHost: x\r\nContent-Length: 2\r\nContent-Length: 0\r\n\r\n{}",
+    )
+    
+    assert response.startswith(b"HTTP/1.1 400")
+    assert closed
+
+
+def test_post_rejects_transfer_encoding(server):
+    response, closed = exchange(
+        server,
+        b"POST /api/chat HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n" + LANGUAGES_REQUEST,
+    )
+    
+    assert response.startswith(b"HTTP/1.1 501")
+    assert response.count(b"HTTP/1.1 ") == 1
+    assert closed
+
+
+def test_post_without_content_length_closes_connection(server):
+    response, closed = exchange(server, b"POST /api/chat HTTP/1.1\r\nHost: x\r\n\r\n" + LANGUAGES_REQUEST)
+    
+    assert response.count(b"HTTP/1.1 ") == 1
+    assert b"Connection: close" in response
+    assert closed
+
+
+def test_post_with_valid_content_length_keeps_connection(server):
+    body = b'{"message": "cerco casa"}'
+    response, closed = exchange(
+        server,
+        b"POST /api/chat HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n" % len(body) + body,
+    )
+    
+    assert response.startswith(b"HTTP/1.1 200")
+    assert b'"category":"casa"' in response
+    assert not closed
+
+
+HEALTH_REQUEST = b"GET /api/health HTTP/1.1\r\nHost: x\r\n\r\n"
+
+
+class ShortTimeoutHandler(main.JokkoHandler):
+    timeout = 0.3
+
+
+def read_response(sock) -> bytes:
+    """Legge una risposta completa (headers + body secondo Content-Length) da una connessione keep-alive"""
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return data
+        data += chunk
+    head, body = data.split(b"\r\n\r\n", 1)
+    length = int(next(line.split(b":")[1] for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")))
+    while len(body) < length:
+        body += sock.recv(65536)
+    return head + b"\r\n\r\n" + body
+
+
+def keep_alive_connection(server):
+    sock = socket.create_connection(server.server_address)
+    sock.settimeout(2)
+    sock.sendall(HEALTH_REQUEST)
+    assert read_response(sock).startswith(b"HTTP/1.1 200")
+    return sock
+
+
+def wait_until(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condizione non raggiunta"
+        time.sleep(0.01)
+
+
+def is_closed(sock) -> bool:
+    sock.settimeout(1)
+    return sock.recv(1) == b""
+
+
+def test_idle_connection_is_parked_and_resumed(make_server):
+    server = make_server(max_workers=1)
+    idle = keep_alive_connection(server)
+    wait_until(lambda: len(server.idle_connections) == 1)
+    
+    # L'unico worker è libero: un altro client non aspetta il timeout della connessione inattiva
+    started = time.monotonic()
+    other = keep_alive_connection(server)
+    assert time.monotonic() - started < 1
+    
+    # La connessione parcheggiata torna in servizio alla richiesta successiva
+    idle.sendall(HEALTH_REQUEST)
+    assert read_response(idle).startswith(b"HTTP/1.1 200")
+    wait_until(lambda: len(server.idle_connections) == 2)
+    idle.close()
+    other.close()
+
+
+def test_pipelined_requests_are_served_without_parking(server):
+    sock = socket.create_connection(server.server_address)
+    sock.settimeout(2)
+    sock.sendall(HEALTH_REQUEST * 3)
+    data = b""
+    while data.count(b"HTTP/1.1 200") < 3:
+        data += sock.recv(65536)
+    sock.close()
+
+
+def test_idle_connection_expires(make_server):
+    server = make_server(handler_class=ShortTimeoutHandler)
+    idle = keep_alive_connection(server)
+    wait_until(lambda: len(server.idle_connections) == 1)
+    
+    wait_until(lambda: not server.idle_connections)
+    assert is_closed(idle)
+    idle.close()
+
+
+def test_oldest_idle_connection_is_evicted(make_server):
+    server = make_server(max_idle=1)
+    oldest = keep_alive_connection(server)
+    wait_until(lambda: len(server.idle_connections) == 1)
+    newest = keep_alive_connection(server)
+    
+    assert is_closed(oldest)
+    wait_until(lambda: len(server.idle_connections) == 1)
+    newest.sendall(HEALTH_REQUEST)
+    assert read_response(newest).startswith(b"HTTP/1.1 200")
+    oldest.close()
+    newest.close()
+
+
+def test_resume_without_free_slot_returns_503(make_server):
+    server = make_server(max_workers=1, max_pending=0)
+    idle = keep_alive_connection(server)
+    wait_until(lambda: len(server.idle_connections) == 1)
+    
+    # Una richiesta incompleta occupa l'unico slot
+    busy = socket.create_connection(server.server_address)
+    busy.sendall(b"GET /api/health HTTP/1.1\r\n")
+    wait_until(lambda: server.slots._value == 0)
+    
+    idle.sendall(HEALTH_REQUEST)
+    response = idle.recv(65536)
+    assert response.startswith(b"HTTP/1.1 503")
+    assert is_closed(idle)
+    
+    busy.sendall(b"Host: x\r\n\r\n")
+    busy.settimeout(2)
+    assert read_response(busy).startswith(b"HTTP/1.1 200")
+    idle.close()
+    busy.close()
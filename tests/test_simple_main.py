@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+import simple_main
+
+
+def baseline_detect_category(message: str) -> str:
+    """Implementazione originale (ricerca per sottostringa) usata come riferimento"""
+    message_lower = message.lower()
+    
+    if any(word in message_lower for word in ["permesso", "soggiorno", "questura", "documenti"]):
+        return "permesso_soggiorno"
+    elif any(word in message_lower for word in ["sanità", "medico", "ospedale", "salute", "cure"]):
+        return "sanita"
+    elif any(word in message_lower for word in ["lavoro", "lavorare", "contratto", "stipendio"]):
+        return "lavoro"
+    elif any(word in message_lower for word in ["casa", "affitto", "abitazione", "alloggio"]):
+        return "casa"
+    elif any(word in message_lower for word in ["scuola", "studio", "educazione", "università", "corso"]):
+        return "educazione"
+    else:
+        return "generale"
+
+
+SAMPLE_MESSAGES = [
+    "Come ottengo il permesso di soggiorno?",
+    "Permessi di soggiorno per studio",
+    "Dove si trova la Questura?",
+    "Mi servono i documenti",
+    "Ho bisogno di un medico",
+    "Cure mediche gratuite",
+    "L'ospedale più vicino",
+    "Cerco lavoro",
+    "Voglio lavorare in regola",
+    "Il mio stipendio è in ritardo",
+    "contratti di lavoro",
+    "Cerco casa in affitto",
+    "Sono una casalinga",
+    "affittasi stanza",
+    "Iscrizione a scuola",
+    "Corsi di italiano",
+    "Borse di studio per l'università",
+    "Buongiorno!",
+    "Ciao, come stai?",
+    "",
+    "SANITÀ PUBBLICA",
+    "permesso/lavoro/casa",
+]
+
+
+@pytest.mark.parametrize("message", SAMPLE_MESSAGES)
+def test_detect_category_matches_baseline(message):
+    assert simple_main.detect_category(message) == baseline_detect_category(message)
+
+
+@pytest.fixture
+def client():
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    
+    return TestClient(simple_main.app)
+
+
+def test_chat_batch(client):
+    batch = [{"message": "Cerco lavoro"}, {"message": "Ciao", "language": "en"}]
+    response = client.post("/api/chat/batch", json=batch)
+    
+    assert response.status_code == 200
+    assert [item["category"] for item in response.json()] == ["lavoro", "generale"]
+
+
+def test_chat_batch_rejects_oversized_batch(client):
+    batch = [{"message": "Cerco lavoro"}] * (simple_main.MAX_BATCH_SIZE + 1)
+    response = client.post("/api/chat/batch", json=batch)
+    
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"